@@ -1,159 +1,128 @@
 # app.py
-import os
-from collections import defaultdict, Counter
-from datetime import datetime
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
-import requests
+import httpx
 import streamlit as st
-import pandas as pd
 import altair as alt
-from dotenv import load_dotenv
-from requests.exceptions import RequestException
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import weather_api
+from weather_api import API_KEY, icon_url
 
 # ---------------------------
 # Page config & env
 # ---------------------------
 st.set_page_config(page_title="Weather Dashboard", page_icon="⛅", layout="wide")
 
-load_dotenv()
-API_KEY = os.getenv("OPENWEATHER_API_KEY")
 if not API_KEY:
     st.error("Missing OPENWEATHER_API_KEY in .env file (add it to your .env)")
     st.stop()
 
 # ---------------------------
-# Helper: Weather API calls
+# Helper: cached API calls
 # ---------------------------
-def get_weather(city: str, units: str = "metric"):
-    """Get current weather for a city."""
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {"q": city, "appid": API_KEY, "units": units}
-    resp = requests.get(url, params=params, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
-    sys = data.get("sys", {})
-    main = data.get("main", {})
-    weather0 = data.get("weather", [{}])[0]
-
-    return {
-        "city": data.get("name"),
-        "country": sys.get("country"),
-        "temp": main.get("temp"),
-        "feels_like": main.get("feels_like"),
-        "humidity": main.get("humidity"),
-        "pressure": main.get("pressure"),
-        "description": weather0.get("description"),
-        "icon": weather0.get("icon"),
-        "wind_speed": data.get("wind", {}).get("speed"),
-        "clouds": data.get("clouds", {}).get("all"),
-        "rain_1h": data.get("rain", {}).get("1h", 0) if data.get("rain") else 0,
-        "sunrise": sys.get("sunrise"),
-        "sunset": sys.get("sunset"),
-        "dt": data.get("dt"),
-    }
+# OpenWeather refreshes roughly every 10 min; cached results expire with it
+get_weather = st.cache_data(ttl=600, max_entries=256, show_spinner=False)(weather_api.get_weather)
+get_forecast = st.cache_data(ttl=600, max_entries=256, show_spinner=False)(weather_api.get_forecast)
 
 
-def get_forecast(city: str, units: str = "metric", days: int = 5):
-    """Get 5-day forecast (aggregated per day)"""
-    url = "https://api.openweathermap.org/data/2.5/forecast"
-    params = {"q": city, "appid": API_KEY, "units": units}
-    resp = requests.get(url, params=params, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
+def fetch_both(city: str, units: str = "metric"):
+    """Current weather and daily forecast for a city, fetched concurrently."""
+    # a pool per call, so one slow or rate-limited lookup can't hold up other
+    # sessions; the workers carry this script's context for st.cache_data
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=2, initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+    ) as ex:
+        f_w = ex.submit(get_weather, city, units=units)
+        f_f = ex.submit(get_forecast, city, units=units)
+        return f_w.result(), f_f.result()
 
-    daily = defaultdict(list)
-    for item in data.get("list", []):
-        ts = item.get("dt")
-        if ts is None:
-            continue
-        date = datetime.fromtimestamp(ts).date().isoformat()
-        daily[date].append(item)
 
-    days_sorted = sorted(daily.keys())
-    result = []
-    for d in days_sorted[:days]:
-        items = daily[d]
-        temps = [x["main"]["temp"] for x in items if x.get("main")]
-        rains = [x.get("rain", {}).get("3h", 0) for x in items]
-        descs = [x["weather"][0]["description"] for x in items if x.get("weather")]
-        icons = [x["weather"][0]["icon"] for x in items if x.get("weather")]
+# ---------------------------
+# Helper: formatting
+# ---------------------------
+_LONG_FMT = "%A, %d %b %Y %I:%M %p"
+_SHORT_FMT = "%I:%M %p"
 
-        if not temps:
-            continue
 
-        result.append({
-            "date": d,
-            "temp_min": min(temps),
-            "temp_max": max(temps),
-            "rain_mm": sum(rains),
-            "description": Counter(descs).most_common(1)[0][0] if descs else "",
-            "icon": Counter(icons).most_common(1)[0][0] if icons else None,
-        })
-    return result
+def _fmt(ts, fmt: str, offset: int = 0) -> str:
+    """Format a unix timestamp in the city's local time (UTC + offset seconds), or "N/A"."""
+    return datetime.fromtimestamp(ts + offset, timezone.utc).strftime(fmt) if ts else "N/A"
 
 
 # ---------------------------
 # CSS (keeps your visual styles)
 # ---------------------------
-st.markdown(
-    """
-    <style>
-    .stApp {
-        background: linear-gradient(to bottom, #87CEEB, #E0FFFF);
-        color: #333333;
-        font-family: "Segoe UI", sans-serif;
-    }
-    h1 {
-        color: #003366 !important;
-        text-align: center;
-        font-size: 2.4rem !important;
-        font-weight: bold !important;
-        margin-bottom: 12px;
-    }
-    h3 {
-        color: #004d66 !important;
-        border-bottom: 2px solid #004d66;
-        padding-bottom: 4px;
-    }
-    .stMetric {
-        background: rgba(255, 255, 255, 0.85);
-        padding: 12px;
-        border-radius: 12px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.12);
-    }
-    .forecast-card {
-        background: rgba(255, 255, 255, 0.9);
-        padding: 12px;
-        margin: 8px;
-        border-radius: 12px;
-        text-align: center;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.12);
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+_CSS = """
+<style>
+.stApp {
+    background: linear-gradient(to bottom, #87CEEB, #E0FFFF);
+    color: #333333;
+    font-family: "Segoe UI", sans-serif;
+}
+h1 {
+    color: #003366 !important;
+    text-align: center;
+    font-size: 2.4rem !important;
+    font-weight: bold !important;
+    margin-bottom: 12px;
+}
+h3 {
+    color: #004d66 !important;
+    border-bottom: 2px solid #004d66;
+    padding-bottom: 4px;
+}
+.stMetric {
+    background: rgba(255, 255, 255, 0.85);
+    padding: 12px;
+    border-radius: 12px;
+    box-shadow: 0 4px 10px rgba(0,0,0,0.12);
+}
+.forecast-card {
+    background: rgba(255, 255, 255, 0.9);
+    padding: 12px;
+    margin: 8px;
+    border-radius: 12px;
+    text-align: center;
+    box-shadow: 0 4px 10px rgba(0,0,0,0.12);
+}
+</style>
+"""
+
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # ---------------------------
 # UI: Title and inputs
 # ---------------------------
 st.title("🌍 Live Weather Dashboard")
 
-col_left, col_right = st.columns([3, 1])
-with col_left:
-    city = st.text_input("Enter city name", "")
-with col_right:
-    unit_choice = st.selectbox("Units", ("Metric (°C)", "Imperial (°F)"))
+# inputs only take effect on submit, so typing or switching units doesn't refetch;
+# afterwards the widgets keep returning the last submitted values
+with st.form("weather_form"):
+    col_left, col_right = st.columns([3, 1])
+    with col_left:
+        city = st.text_input("Enter city name", "")
+    with col_right:
+        unit_choice = st.selectbox("Units", ("Metric (°C)", "Imperial (°F)"))
+    st.form_submit_button("Get weather")
 units = "metric" if unit_choice.startswith("Metric") else "imperial"
 
 if not city:
     st.info("Type a city name above (for example: 'Mumbai' or 'London') and press Enter.")
 else:
+    # manual refetch: drop the cached results before their TTL runs out
+    if st.button("🔄 Refresh"):
+        get_weather.clear()
+        get_forecast.clear()
+
     # Fetch and render
     try:
-        weather = get_weather(city, units=units)
-        forecast = get_forecast(city, units=units)
-    except RequestException as e:
+        weather, forecast = fetch_both(city, units=units)
+    except httpx.HTTPError as e:
         st.error(f"Network / API error: {e}")
         st.stop()
     except Exception as e:
@@ -161,22 +130,11 @@ else:
         st.stop()
 
     # safe datetime formatting
-    dt_ts = weather.get("dt") or 0
-    date_time = (
-        datetime.fromtimestamp(dt_ts).strftime("%A, %d %b %Y %I:%M %p")
-        if dt_ts
-        else "N/A"
-    )
-    sunrise = (
-        datetime.fromtimestamp(weather.get("sunrise")).strftime("%I:%M %p")
-        if weather.get("sunrise")
-        else "N/A"
-    )
-    sunset = (
-        datetime.fromtimestamp(weather.get("sunset")).strftime("%I:%M %p")
-        if weather.get("sunset")
-        else "N/A"
-    )
+    # same UTC offset the forecast days are bucketed by, so header and cards agree
+    tz_offset = weather.get("timezone") or 0
+    date_time = _fmt(weather.get("dt"), _LONG_FMT, tz_offset)
+    sunrise = _fmt(weather.get("sunrise"), _SHORT_FMT, tz_offset)
+    sunset = _fmt(weather.get("sunset"), _SHORT_FMT, tz_offset)
 
     # Header
     st.subheader(f"📌 {weather.get('city', city)}, {weather.get('country', '')}")
@@ -186,8 +144,7 @@ else:
     col1, col2 = st.columns([1, 3])
     with col1:
         if weather.get("icon"):
-            icon_url = f"http://openweathermap.org/img/wn/{weather['icon']}@4x.png"
-            st.image(icon_url, width=120)
+            st.image(icon_url(weather["icon"], "4x"), width=120)
         else:
             st.write("")  # keep column height aligned
     with col2:
@@ -223,34 +180,38 @@ else:
     colH.warning(f"📆 Local time: {date_time}")
 
     # Forecast cards
-    if forecast:
+    if not forecast.empty:
         st.markdown("### 🗓 5-Day Forecast")
         cols = st.columns(len(forecast))
         temp_unit = "°C" if units == "metric" else "°F"
-        for c, day in zip(cols, forecast):
-            with c:
-                st.markdown('<div class="forecast-card">', unsafe_allow_html=True)
-                st.write(f"📅 {day['date']}")
-                if day.get("icon"):
-                    st.image(f"http://openweathermap.org/img/wn/{day['icon']}@2x.png", width=64)
-                st.write(f"**{day['description'].title()}**")
-                st.write(f"🌡 Min: {day['temp_min']:.1f}{temp_unit}")
-                st.write(f"🌡 Max: {day['temp_max']:.1f}{temp_unit}")
-                st.write(f"🌧 Rain: {day['rain_mm']:.1f} mm")
-                st.markdown('</div>', unsafe_allow_html=True)
+        for c, day in zip(cols, forecast.to_dict("records")):
+            # one markdown element per card; no blank lines, or the HTML block would end early
+            img = f'<img src="{icon_url(day["icon"])}" width="64">' if day.get("icon") else ""
+            c.markdown(
+                f"""<div class="forecast-card">
+  <div>📅 {day['date']:%Y-%m-%d}</div>{img}
+  <div><b>{html.escape(day['description'].title())}</b></div>
+  <div>🌡 Min: {day['temp_min']:.1f}{temp_unit}</div>
+  <div>🌡 Max: {day['temp_max']:.1f}{temp_unit}</div>
+  <div>🌧 Rain: {day['rain_mm']:.1f} mm</div>
+</div>""",
+                unsafe_allow_html=True,
+            )
 
         # Chart of trends
         st.markdown("### 📈 Forecast Trends")
-        df = pd.DataFrame({
-            "date": pd.to_datetime([f["date"] for f in forecast]),
-            "Min Temp": [f["temp_min"] for f in forecast],
-            "Max Temp": [f["temp_max"] for f in forecast],
-            "Rain (mm)": [f["rain_mm"] for f in forecast],
-        })
-        df_melted = df.melt(id_vars=["date"], var_name="Metric", value_name="Value")
+        # long format (date, Metric, Value) straight from the daily frame
+        df_long = (
+            forecast.set_index("date")
+            [["temp_min", "temp_max", "rain_mm"]]
+            .rename(columns={"temp_min": "Min Temp", "temp_max": "Max Temp", "rain_mm": "Rain (mm)"})
+            .stack(future_stack=True)
+            .rename_axis(["date", "Metric"])
+            .reset_index(name="Value")
+        )
 
         chart = (
-            alt.Chart(df_melted)
+            alt.Chart(df_long)
             .mark_line(point=True)
             .encode(
                 x=alt.X("date:T", title="Date"),
@@ -0,0 +1,243 @@
+# weather_api.py
+# OpenWeather client shared by app.py and fetch_weather.py: pooled HTTP/2
+# client, conditional GETs and JSON decoding live here. Nothing here depends on
+# streamlit, so the CLI can use it as-is; app.py adds the st.cache_data TTL caching.
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib decoder via resp.json()
+    orjson = None
+
+try:
+    import polars as pl
+except ImportError:  # optional: the numpy reductions below are used without it
+    pl = None
+
+load_dotenv()
+API_KEY = os.getenv("OPENWEATHER_API_KEY")
+
+# no Connection header: it's connection-specific and not allowed over HTTP/2
+_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "weather-dashboard/1.0",
+}
+
+
+@functools.lru_cache(maxsize=None)  # one per process, shared by all sessions
+def _http() -> httpx.Client:
+    """Shared HTTP/2 client; weather + forecast are multiplexed on one TLS connection."""
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+    )
+    return httpx.Client(transport=transport, headers=_HEADERS, timeout=10.0)
+
+
+# the transport only retries connection errors; rate limits and 5xx are retried here
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+_RETRIES = 3
+_BACKOFF = 0.3
+_MAX_RETRY_AFTER = 10.0
+
+
+def _get_with_retry(url: str, params: dict, headers: dict) -> httpx.Response:
+    """GET with exponential backoff on 429/5xx, honouring a short Retry-After."""
+    for attempt in range(_RETRIES + 1):
+        resp = _http().get(url, params=params, headers=headers)
+        if resp.status_code not in _RETRY_STATUSES or attempt == _RETRIES:
+            return resp
+        delay = _BACKOFF * 2 ** attempt
+        retry_after = resp.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), _MAX_RETRY_AFTER))
+        time.sleep(delay)
+    return resp
+
+
+def _json(resp):
+    """Decode a JSON response body, with orjson when it's installed."""
+    return orjson.loads(resp.content) if orjson is not None else resp.json()
+
+
+# same bound as app.py's st.cache_data caches the validators sit under
+_MAX_VALIDATORS = 256
+
+
+@functools.lru_cache(maxsize=None)  # one per process, shared by all sessions
+def _validators() -> tuple:
+    """LRU of (url, city, units) -> (ETag, Last-Modified, parsed body), and its lock."""
+    return OrderedDict(), threading.Lock()
+
+
+def _cached_get(url: str, params: dict, cache_key: tuple):
+    """Conditional GET: a 304 Not Modified reuses the body parsed last time."""
+    store, lock = _validators()
+    with lock:
+        entry = store.get(cache_key)
+        if entry is not None:
+            store.move_to_end(cache_key)
+    etag, last_mod, cached = entry or (None, None, None)
+    headers = {}
+    if cached is not None:
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_mod:
+            headers["If-Modified-Since"] = last_mod
+    resp = _get_with_retry(url, params, headers)
+    if resp.status_code == 304 and cached is not None:
+        return cached
+    resp.raise_for_status()
+    data = _json(resp)
+    etag, last_mod = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if etag or last_mod:
+        with lock:
+            store[cache_key] = (etag, last_mod, data)
+            store.move_to_end(cache_key)
+            while len(store) > _MAX_VALIDATORS:
+                store.popitem(last=False)
+    return data
+
+
+def get_weather(city: str, units: str = "metric"):
+    """Get current weather for a city."""
+    url = "https://api.openweathermap.org/data/2.5/weather"
+    params = {"q": city, "appid": API_KEY, "units": units}
+    data = _cached_get(url, params, cache_key=(url, city, units))
+    sys = data.get("sys", {})
+    main = data.get("main", {})
+    weather0 = data.get("weather", [{}])[0]
+
+    return {
+        "city": data.get("name"),
+        "country": sys.get("country"),
+        "temp": main.get("temp"),
+        "feels_like": main.get("feels_like"),
+        "humidity": main.get("humidity"),
+        "pressure": main.get("pressure"),
+        "description": weather0.get("description"),
+        "icon": weather0.get("icon"),
+        "wind_speed": data.get("wind", {}).get("speed"),
+        "clouds": data.get("clouds", {}).get("all"),
+        "rain_1h": data.get("rain", {}).get("1h", 0) if data.get("rain") else 0,
+        "sunrise": sys.get("sunrise"),
+        "sunset": sys.get("sunset"),
+        "dt": data.get("dt"),
+        "timezone": data.get("timezone", 0),
+    }
+
+
+def _mode(xs: list, default=None):
+    """Most frequent non-null value in ``xs`` (first seen wins ties), else ``default``."""
+    xs = [x for x in xs if x is not None]
+    return max(dict.fromkeys(xs), key=xs.count) if xs else default
+
+
+def _daily_polars(dates, temps, rains, descs, icons, days: int) -> pd.DataFrame:
+    """Per-day aggregation on polars' multi-threaded group-by."""
+    df = pl.DataFrame({
+        "date": pl.Series(dates),
+        "temp": pl.Series(temps, dtype=pl.Float64, nan_to_null=True),
+        "rain3h": pl.Series(rains, dtype=pl.Float64),
+        "desc": pl.Series(descs, dtype=pl.Utf8),
+        "icon": pl.Series(icons, dtype=pl.Utf8),
+    })
+    g = (
+        df.group_by("date")
+        .agg(
+            pl.col("temp").min().alias("temp_min"),
+            pl.col("temp").max().alias("temp_max"),
+            pl.col("rain3h").sum().alias("rain_mm"),
+            # polars' mode() orders ties arbitrarily; keep each day's values (row
+            # order is preserved within a group) and pick with _mode like the numpy path
+            pl.col("desc").drop_nulls(),
+            pl.col("icon").drop_nulls(),
+        )
+        .sort("date")
+        .head(days)
+        .filter(pl.col("temp_min").is_not_null())
+    )
+    out = g.select("date", "temp_min", "temp_max", "rain_mm").to_pandas()
+    out["description"] = [_mode(xs, "") for xs in g["desc"].to_list()]
+    out["icon"] = [_mode(xs) for xs in g["icon"].to_list()]
+    return out
+
+
+def get_forecast(city: str, units: str = "metric", days: int = 5):
+    """Get 5-day forecast as a DataFrame with one row per day."""
+    url = "https://api.openweathermap.org/data/2.5/forecast"
+    params = {"q": city, "appid": API_KEY, "units": units}
+    data = _cached_get(url, params, cache_key=(url, city, units))
+
+    items = data.get("list", [])
+
+    # one column buffer per field, filled in a single pass over the 3-hour buckets
+    n = len(items)
+    dts = np.empty(n, dtype="int64")
+    temps = np.full(n, np.nan)
+    rains = np.zeros(n)
+    descs = [None] * n
+    icons = [None] * n
+    k = 0
+    for x in items:
+        ts = x.get("dt")
+        if ts is None:
+            continue
+        m = x.get("main")
+        r = x.get("rain")
+        w = x.get("weather")
+        w0 = w[0] if w else {}
+        dts[k] = ts
+        if m and m.get("temp") is not None:
+            temps[k] = m["temp"]
+        if r:
+            rains[k] = r.get("3h", 0)
+        descs[k] = w0.get("description")
+        icons[k] = w0.get("icon")
+        k += 1
+    if not k:
+        return pd.DataFrame()
+    dts, temps, rains, descs, icons = dts[:k], temps[:k], rains[:k], descs[:k], icons[:k]
+
+    tz_offset = data.get("city", {}).get("timezone", 0)
+    # local calendar day straight from the epoch seconds, no string round trip
+    dates = ((dts + tz_offset) // 86400).astype("datetime64[D]")
+    if pl is not None:
+        return _daily_polars(dates, temps, rains, descs, icons, days)
+
+    # sort buckets by day so each day is one contiguous slice, then keep the first `days`
+    order = np.argsort(dates, kind="stable")
+    dates, temps, rains = dates[order], temps[order], rains[order]
+    descs = [descs[i] for i in order]
+    icons = [icons[i] for i in order]
+    day_keys, starts = np.unique(dates, return_index=True)
+    if len(day_keys) > days:
+        cut = starts[days]
+        temps, rains, descs, icons = temps[:cut], rains[:cut], descs[:cut], icons[:cut]
+        day_keys, starts = day_keys[:days], starts[:days]
+    bounds = np.append(starts[1:], len(temps))
+
+    g = pd.DataFrame({
+        "date": day_keys,
+        "temp_min": np.fmin.reduceat(temps, starts),
+        "temp_max": np.fmax.reduceat(temps, starts),
+        "rain_mm": np.add.reduceat(rains, starts),
+        "description": [_mode(descs[i:j], "") for i, j in zip(starts, bounds)],
+        "icon": [_mode(icons[i:j]) for i, j in zip(starts, bounds)],
+    }, copy=False)
+    return g[g["temp_min"].notna()].reset_index(drop=True)
+
+
+def icon_url(code: str, size: str = "2x") -> str:
+    """OpenWeather icon URL (https, so the browser skips the redirect)."""
+    return f"https://openweathermap.org/img/wn/{code}@{size}.png"